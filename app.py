@@ -11,6 +11,7 @@
 
 import logging
 from pathlib import Path
+from types import MappingProxyType
 
 from totalseg_operator import TotalsegmentatorOperator, TotalsegmentatorPDFOperator
 
@@ -38,6 +39,11 @@ class App(Application):
     # App's version. <git version tag> or '0.0.0' if not specified.
     version = "0.1.0"
 
+    # Constant across compositions, so built once with the class rather than in every compose()
+    _MODEL_INFO = ModelInfo("J. Wasserthal","TotalSegmentator","0.0.1","")
+    # Read-only since the same mapping is shared by every composed PDF writer
+    _CUSTOM_TAGS = MappingProxyType({"SeriesDescription":"TotalSegmentator Report: Organ volumes"})
+
     def compose(self):
         """This application has three operators.
 
@@ -50,8 +56,6 @@ class App(Application):
         sample_data_path = Path(app_context.input_path)
         output_data_path = Path(app_context.output_path)
 
-        model_info = ModelInfo("J. Wasserthal","TotalSegmentator","0.0.1","")
-
         # Please note that the Application object, self, is passed as the first positional argument
         # and the others as kwargs.
         # Also note the CountCondition of 1 on the first operator, indicating to the application executor
@@ -60,12 +64,14 @@ class App(Application):
         loader = DICOMDataLoaderOperator(self,CountCondition(self,1),input_folder=sample_data_path,name="dicom_loader")
         
         selector = DICOMSeriesSelectorOperator(self, name="series_selector")
-        pdf_to_dcm = DICOMEncapsulatedPDFWriterOperator(self,name="pdf_dcm_encapsulator",output_folder=output_data_path,model_info=model_info,custom_tags={"SeriesDescription":"TotalSegmentator Report: Organ volumes"})
+        series_to_vol = DICOMSeriesToVolumeOperator(self, name="series_to_volume")
+        pdf_to_dcm = DICOMEncapsulatedPDFWriterOperator(self,name="pdf_dcm_encapsulator",output_folder=output_data_path,model_info=App._MODEL_INFO,custom_tags=App._CUSTOM_TAGS)
         totalseg_op = TotalsegmentatorOperator(self, name="totalseg_op")
         pdf_op = TotalsegmentatorPDFOperator(self,name="totalseg_pdf_op")
 
         self.add_flow(loader,selector,{("dicom_study_list","dicom_study_list")})
-        self.add_flow(selector,totalseg_op,{("study_selected_series_list","study_selected_series_list")})
+        self.add_flow(selector,series_to_vol,{("study_selected_series_list","study_selected_series_list")})
+        self.add_flow(series_to_vol,totalseg_op,{("image","image")})
         self.add_flow(totalseg_op,pdf_op,{("report_dict","report_dict")})
         self.add_flow(selector,pdf_to_dcm,{("study_selected_series_list","study_selected_series_list")})
         self.add_flow(pdf_op,pdf_to_dcm,{("pdf_bytes","pdf_bytes")})
@@ -19,10 +19,53 @@ from monai.transforms import SaveImage
 import nibabel as nib
 import shutil
 import tempfile
-import subprocess
-import json 
-from totalseg_pdf import generate_pdf_report
+from contextlib import contextmanager
+import importlib
+from totalseg_pdf import generate_pdf_report, has_volumes
 import os
+import torch
+
+DEVICE = "gpu" if torch.cuda.is_available() else "cpu"
+
+# TotalSegmentator looks up its weights through TOTALSEG_HOME_DIR, keep them in the project root
+TOTALSEG_HOME_DIR = os.path.dirname(os.path.abspath(__file__))+"/.totalseg"
+os.environ["TOTALSEG_HOME_DIR"] = TOTALSEG_HOME_DIR
+
+# Imported once per process so torch and nnU-Net are not re-initialized for every study
+from totalsegmentator.python_api import totalsegmentator
+from totalsegmentator.config import setup_nnunet, setup_totalseg
+from totalsegmentator.libs import download_pretrained_weights
+
+# Fast (3mm) total model and the 6mm model TotalSegmentator uses to crop around the roi_subset.
+# Mirrors TotalSegmentator's own choice for fast=True with a roi_subset, keep in sync with the call in compute()
+TOTALSEG_TASK_IDS = (297, 298)
+
+# TotalSegmentator's nnU-Net scratch holds compressed NIfTIs of the volume resampled to 3mm/6mm and their
+# segmentations, all smaller than the in-memory volume, so twice its size leaves ample headroom
+SHM_DIR = "/dev/shm"
+SHM_SIZE_FACTOR = 2
+
+@contextmanager
+def _scratch_on_shm(nbytes: int):
+    """Points tempfile, and with it TotalSegmentator's nnU-Net scratch directories, at the RAM backed
+    /dev/shm for the duration of the block, provided it has room for nbytes * SHM_SIZE_FACTOR.
+    """
+    previous = tempfile.tempdir
+    if os.path.isdir(SHM_DIR) and shutil.disk_usage(SHM_DIR).free > nbytes * SHM_SIZE_FACTOR:
+        tempfile.tempdir = SHM_DIR
+    try:
+        yield
+    finally:
+        tempfile.tempdir = previous
+
+def _image_to_nifti(image: Image) -> nib.Nifti1Image:
+    """Wraps the voxel data of a MONAI Deploy Image in a NIfTI image.
+
+    The Image array is in [DHW] order while the nifti_affine_transform indexes it as [WHD],
+    so the array is transposed, which is a view and does not copy the voxels.
+    """
+    return nib.Nifti1Image(image.asnumpy().T, image.metadata()["nifti_affine_transform"])
+
 # If `pip_packages` is specified, the definition will be aggregated with the package dependency list of other
 # operators and the application in packaging time.
 # @md.env(pip_packages=["scikit-image >= 0.17.2"])
@@ -41,6 +84,10 @@ class TotalsegmentatorPDFOperator(Operator):
     def compute(self, op_input, op_output, context):
             
         report_dict = op_input.receive("report_dict")
+        if not has_volumes(report_dict):
+            # Nothing is emitted, which leaves the PDF writer unscheduled instead of encapsulating an empty report
+            print("No organ volumes in the statistics, skipping the PDF report.")
+            return
         pdf_bytes = generate_pdf_report(report_dict)
         op_output.emit(pdf_bytes, "pdf_bytes")
 
@@ -59,34 +106,34 @@ class TotalsegmentatorOperator(Operator):
             fragment (Fragment): The instance of Application class which is derived from Fragment
         """
 
+        # Pay TotalSegmentator's one-off costs while the app is composed rather than on the first study
+        setup_nnunet()
+        setup_totalseg()
+        for task_id in TOTALSEG_TASK_IDS:
+            download_pretrained_weights(task_id)
+        # Pulls in nnU-Net, has to come after setup_nnunet() has set its environment variables
+        importlib.import_module("totalsegmentator.nnunet")
+
         # Need to call the base class constructor last
         super().__init__(fragment, *args, **kwargs)
     
     def setup(self, spec: OperatorSpec):
-        spec.input("study_selected_series_list")
+        spec.input("image")
         spec.output("report_dict")
 
     def compute(self, op_input, op_output, context):
 
-        data_in = op_input.receive("study_selected_series_list")
+        image = op_input.receive("image")
 
-        with tempfile.TemporaryDirectory() as temp:
-            print(f"Copying DICOM Instances...")
-            for idx, f in enumerate(data_in[0].selected_series[0].series.get_sop_instances()):
-                dcm_filepath = f._sop.filename
-                shutil.copy2(dcm_filepath, temp)
-            
+        with _scratch_on_shm(image.asnumpy().nbytes):
             print("Running TotalSegmentator...")
-            in_dir = str(temp)
-            out_dir = in_dir + "/out"
-            totalseg_home_dir = os.path.dirname(os.path.abspath(__file__))+"/.totalseg"
-            cmd = f"TotalSegmentator -f --roi_subset spleen --statistics --body_seg -i {in_dir} -o {out_dir}"
-            env = os.environ.copy()
-            env["TOTALSEG_HOME_DIR"] = totalseg_home_dir
-            subprocess.check_output(cmd.split(" "),env=env)
-            js = out_dir + "/statistics.json"
-            with open(js,"r") as handle:
-               report = json.load(handle)
+            # The volume is handed over in memory, so the DICOM series is never re-read or re-parsed.
+            # Only the volumes are reported: body_seg is left out and the masks are not written.
+            # fast=True with a roi_subset runs the models in TOTALSEG_TASK_IDS, change them together.
+            # TotalSegmentator only returns the statistics when no output folder is given, with one it
+            # writes statistics.json instead and returns None for them, so do not pass output here.
+            _, report = totalsegmentator(_image_to_nifti(image), fast=True, roi_subset=["spleen"], statistics=True,
+                                         skip_saving=True, quiet=True, device=DEVICE)
 
         op_output.emit(report, "report_dict")
 
@@ -1,13 +1,179 @@
 # Import necessary libraries
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
 from io import BytesIO
 import datetime
+import numbers
+import numpy as np
 
-def generate_pdf_report(data: dict) -> bytes:
+# --- Layout ---
+# Everything below is deterministic, so it is built once at import instead of on every report
+MARGIN = 1*inch
+AVAILABLE_WIDTH = letter[0] - 2*MARGIN
+COL_WIDTHS = [AVAILABLE_WIDTH * 0.4, AVAILABLE_WIDTH * 0.6] # 40% for organ, 60% for volume
+
+# Styles for paragraphs and table
+_STYLES = getSampleStyleSheet()
+TITLE_STYLE = _STYLES['h1']
+# Derived rather than setting alignment on the shared 'Normal' style
+CENTERED_STYLE = ParagraphStyle('centered', parent=_STYLES['Normal'], alignment=1)
+
+REPORT_TITLE = "Organ Volume Report"
+NO_DATA_MESSAGE = "No valid organ volume data available to display."
+
+# Platypus frames inset their content, the canvas path applies the same offset by hand
+FRAME_PADDING = 6
+CELL_FONT_SIZE = 10
+CELL_LEADING = 12
+# Cell fonts and paddings, shared by TABLE_STYLE and the canvas path so both draw the same table
+HEADER_FONT = 'Helvetica-Bold'
+BODY_FONT = 'Helvetica'
+CELL_SIDE_PADDING = 10
+CELL_TOP_PADDING = 6
+HEADER_BOTTOM_PADDING = 12
+BODY_BOTTOM_PADDING = 6
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey), # Header background
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke), # Header text color
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'), # Center alignment for all cells
+    ('FONTNAME', (0, 0), (-1, 0), HEADER_FONT), # Header font
+    ('BOTTOMPADDING', (0, 0), (-1, 0), HEADER_BOTTOM_PADDING), # Header padding
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige), # Body background
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black), # Body text color
+    ('FONTNAME', (0, 1), (-1, -1), BODY_FONT), # Body font
+    ('GRID', (0, 0), (-1, -1), 1, colors.black), # Grid lines
+    ('LEFTPADDING', (0, 0), (-1, -1), CELL_SIDE_PADDING),
+    ('RIGHTPADDING', (0, 0), (-1, -1), CELL_SIDE_PADDING),
+    ('TOPPADDING', (0, 0), (-1, -1), CELL_TOP_PADDING),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), BODY_BOTTOM_PADDING),
+])
+
+def _is_volume(value) -> bool:
+    """Whether value can be read as a volume, i.e. it is a number or converts to one."""
+    if isinstance(value, numbers.Real):
+        return True
+    try:
+        float(value)
+    except (ValueError, TypeError):
+        return False
+    return True
+
+def has_volumes(data) -> bool:
+    """Whether data holds at least one usable organ volume, i.e. whether its report would show a table."""
+    return isinstance(data, dict) and any(
+        isinstance(v, dict) and 'volume' in v and _is_volume(v['volume']) for v in data.values()
+    )
+
+def _triage(data: dict):
+    """
+    Sorts the entries of a statistics dictionary by whether they hold a usable volume.
+
+    Returns:
+        tuple: (valid_keys, valid_vols, invalid_keys) where valid_vols holds the volumes
+               of valid_keys in mm³ as a float64 array and invalid_keys the organs with a
+               volume that is not numeric. Organs in neither list have no volume at all.
+    """
+    keys = [k for k, v in data.items() if isinstance(v, dict) and 'volume' in v]
+    is_valid = [_is_volume(data[k]['volume']) for k in keys]
+    valid_keys = [k for k, ok in zip(keys, is_valid) if ok]
+    invalid_keys = [k for k, ok in zip(keys, is_valid) if not ok]
+    valid_vols = np.fromiter((data[k]['volume'] for k in valid_keys), dtype=np.float64, count=len(valid_keys))
+    return valid_keys, valid_vols, invalid_keys
+
+def _format_volumes(volumes_mm3: np.ndarray) -> list:
+    """Converts volumes from mm³ to cm³ and formats them to 2 decimal places."""
+    return np.char.mod("%.2f", volumes_mm3 / 1000.0).tolist()
+
+def _build_platypus(buffer, current_date: str, table_data: list, valid_entries: int):
+    """Lays the report out with reportlab's Platypus flowables, for layouts that outgrow the canvas path."""
+    # Create the PDF document
+    # Using letter page size and setting margins
+    doc = SimpleDocTemplate(buffer, pagesize=letter,
+                            leftMargin=MARGIN, rightMargin=MARGIN,
+                            topMargin=MARGIN, bottomMargin=MARGIN)
+
+    # Story list to hold the elements of the PDF
+    story = []
+
+    # --- Title ---
+    story.append(Paragraph(REPORT_TITLE, TITLE_STYLE))
+    story.append(Spacer(1, 0.2*inch)) # Add space after title
+
+    # --- Date ---
+    story.append(Paragraph(f"Report generated on: {current_date}", CENTERED_STYLE))
+    story.append(Spacer(1, 0.3*inch)) # Add space after date
+
+    if valid_entries == 0:
+        # Add a message to the PDF instead of an empty table
+        story.append(Paragraph(NO_DATA_MESSAGE, CENTERED_STYLE))
+    else:
+        # --- Create Table ---
+        organ_table = Table(table_data, colWidths=COL_WIDTHS)
+        organ_table.setStyle(TABLE_STYLE)
+
+        # Add table to the story
+        story.append(organ_table)
+        story.append(Spacer(1, 0.5*inch)) # Add space after table
+
+    # --- Footer (Optional) ---
+    # You could add a footer here if needed
+    # story.append(Paragraph("--- End of Report ---", CENTERED_STYLE))
+
+    doc.build(story)
+
+def _draw_canvas(buffer, current_date: str, table_data: list, valid_entries: int):
+    """Draws the report straight onto a canvas, mirroring the Platypus layout without its flowables."""
+    c = canvas.Canvas(buffer, pagesize=letter)
+    page_width, page_height = letter
+    top = page_height - MARGIN - FRAME_PADDING
+
+    # --- Title ---
+    c.setFont(TITLE_STYLE.fontName, TITLE_STYLE.fontSize)
+    y = top - TITLE_STYLE.fontSize
+    c.drawString(MARGIN + FRAME_PADDING, y, REPORT_TITLE)
+    y -= TITLE_STYLE.leading - TITLE_STYLE.fontSize + TITLE_STYLE.spaceAfter + 0.2*inch
+
+    # --- Date ---
+    c.setFont(CENTERED_STYLE.fontName, CENTERED_STYLE.fontSize)
+    y -= CENTERED_STYLE.fontSize
+    c.drawCentredString(page_width / 2, y, f"Report generated on: {current_date}")
+    y -= CENTERED_STYLE.leading - CENTERED_STYLE.fontSize + 0.3*inch
+
+    if valid_entries == 0:
+        y -= CENTERED_STYLE.fontSize
+        c.drawCentredString(page_width / 2, y, NO_DATA_MESSAGE)
+        c.save()
+        return
+
+    # --- Table ---
+    # Same look as TABLE_STYLE, rows that do not fit continue on the next page
+    col_edges = [MARGIN, MARGIN + COL_WIDTHS[0], MARGIN + AVAILABLE_WIDTH]
+    col_centers = [(col_edges[0] + col_edges[1]) / 2, (col_edges[1] + col_edges[2]) / 2]
+    for row_idx, row in enumerate(table_data):
+        header = row_idx == 0
+        bottom_padding = HEADER_BOTTOM_PADDING if header else BODY_BOTTOM_PADDING
+        row_height = CELL_TOP_PADDING + CELL_LEADING + bottom_padding
+        if y - row_height < MARGIN + FRAME_PADDING:
+            c.showPage()
+            y = top
+        c.setFillColor(colors.grey if header else colors.beige)
+        c.rect(MARGIN, y - row_height, AVAILABLE_WIDTH, row_height, stroke=1, fill=1)
+        c.line(col_edges[1], y - row_height, col_edges[1], y)
+        c.setFillColor(colors.whitesmoke if header else colors.black)
+        c.setFont(HEADER_FONT if header else BODY_FONT, CELL_FONT_SIZE)
+        baseline = y - row_height + bottom_padding + CELL_LEADING - CELL_FONT_SIZE
+        for x, text in zip(col_centers, row):
+            c.drawCentredString(x, baseline, text)
+        y -= row_height
+
+    c.save()
+
+def generate_pdf_report(data: dict, use_platypus: bool = False) -> bytes:
     """
     Generates a PDF report displaying organ volumes from a dictionary.
 
@@ -19,6 +185,8 @@ def generate_pdf_report(data: dict) -> bytes:
                   "spleen": {"volume": 377109.0, "intensity": 92.77547},
                   "liver": {"volume": 1500000.0, "intensity": 105.0}
               }
+        use_platypus: Lay the report out with Platypus flowables instead of
+              drawing the fixed layout directly onto the canvas.
 
     Returns:
         bytes: The generated PDF report as bytes.
@@ -31,114 +199,45 @@ def generate_pdf_report(data: dict) -> bytes:
     # Create a buffer to hold the PDF data
     buffer = BytesIO()
 
-    # Create the PDF document
-    # Using letter page size and setting margins
-    doc = SimpleDocTemplate(buffer, pagesize=letter,
-                            leftMargin=1*inch, rightMargin=1*inch,
-                            topMargin=1*inch, bottomMargin=1*inch)
-
-    # Styles for paragraphs and table
-    styles = getSampleStyleSheet()
-    title_style = styles['h1']
-    normal_style = styles['Normal']
-    normal_style.alignment = 1 # Center alignment for table content
-
-    # Story list to hold the elements of the PDF
-    story = []
-
-    # --- Title ---
-    report_title = "Organ Volume Report"
-    story.append(Paragraph(report_title, title_style))
-    story.append(Spacer(1, 0.2*inch)) # Add space after title
-
     # --- Date ---
     current_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    story.append(Paragraph(f"Report generated on: {current_date}", styles['Normal']))
-    story.append(Spacer(1, 0.3*inch)) # Add space after date
 
     # --- Table Data ---
     # Prepare table data header
     table_data = [['Organ', 'Volume (cm³)']]
 
+    # Validate all entries first, then convert and format the valid volumes in one go
+    valid_keys, valid_vols, invalid_keys = _triage(data)
+    formatted_volumes = dict(zip(valid_keys, _format_volumes(valid_vols)))
+    invalid_keys = set(invalid_keys)
+
+    for organ in data:
+        if organ in invalid_keys:
+            print(f"Warning: Invalid volume data for organ '{organ}'. Skipping.")
+        elif organ not in formatted_volumes:
+            print(f"Warning: Missing or invalid volume data for organ '{organ}'. Skipping.")
+
     # Populate table data from the input dictionary
-    valid_entries = 0
-    for organ, details in data.items():
-        if isinstance(details, dict) and 'volume' in details:
-            try:
-                # Convert volume from mm³ to cm³ and format
-                volume_mm3 = float(details['volume'])
-                volume_cm3 = volume_mm3 / 1000.0
-                # Format to 2 decimal places
-                formatted_volume = f"{volume_cm3:.2f}"
-                table_data.append([organ.capitalize(), formatted_volume])
-                valid_entries += 1
-            except (ValueError, TypeError):
-                print(f"Warning: Invalid volume data for organ '{organ}'. Skipping.")
-                table_data.append([organ.capitalize(), "Invalid Data"])
-        else:
-             print(f"Warning: Missing or invalid volume data for organ '{organ}'. Skipping.")
-             table_data.append([organ.capitalize(), "Missing Data"])
-
-    if valid_entries == 0 and len(data) > 0:
-         print("Error: No valid volume data found in the input dictionary.")
-         # Add a message to the PDF instead of an empty table
-         story.append(Paragraph("No valid organ volume data available to display.", normal_style))
-         doc.build(story)
-         buffer.seek(0)
-         return buffer.getvalue()
-    elif valid_entries == 0:
-        # Handle case where input dictionary was empty initially
-         story.append(Paragraph("Input data was empty.", normal_style))
-         doc.build(story)
-         buffer.seek(0)
-         return buffer.getvalue()
-
-
-    # --- Create Table ---
-    # Calculate available width for the table
-    page_width, page_height = letter
-    available_width = page_width - doc.leftMargin - doc.rightMargin
-
-    # Set column widths (adjust as needed)
-    col_widths = [available_width * 0.4, available_width * 0.6] # 40% for organ, 60% for volume
-
-    # Create the table object
-    organ_table = Table(table_data, colWidths=col_widths)
-
-    # --- Table Style ---
-    table_style = TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey), # Header background
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke), # Header text color
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'), # Center alignment for all cells
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'), # Header font
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12), # Header padding
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige), # Body background
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black), # Body text color
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'), # Body font
-        ('GRID', (0, 0), (-1, -1), 1, colors.black), # Grid lines
-        ('LEFTPADDING', (0, 0), (-1, -1), 10),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-    ])
-    organ_table.setStyle(table_style)
-
-    # Add table to the story
-    story.append(organ_table)
-    story.append(Spacer(1, 0.5*inch)) # Add space after table
+    table_data += [
+        [organ.capitalize(), formatted_volumes.get(organ, "Invalid Data" if organ in invalid_keys else "Missing Data")]
+        for organ in data
+    ]
+    valid_entries = len(valid_keys)
 
-    # --- Footer (Optional) ---
-    # You could add a footer here if needed
-    # story.append(Paragraph("--- End of Report ---", normal_style))
+    if valid_entries == 0:
+        print("Error: No valid volume data found in the input dictionary.")
 
     # --- Build the PDF ---
+    build = _build_platypus if use_platypus else _draw_canvas
     try:
-        doc.build(story)
+        build(buffer, current_date, table_data, valid_entries)
     except Exception as e:
         print(f"Error building PDF: {e}")
         return None
 
-    # Get the PDF data from the buffer
+    # Get the PDF data from the buffer. getvalue() hands over the buffer's own bytes object
+    # rather than a copy, and closing the buffer leaves the returned bytes as its only owner.
+    # The bytes type itself is kept since DICOMEncapsulatedPDFWriterOperator only accepts bytes.
     pdf_bytes = buffer.getvalue()
     buffer.close()
 